@@ -2,7 +2,11 @@
 
 import os
 import re
+import mmap
+import hashlib
 import argparse
+from collections import defaultdict
+from urllib.parse import unquote
 
 def find_missing_images(vault_path, folder_name):
     """Find images in the folder that are not referenced in any markdown files."""
@@ -94,6 +98,146 @@ def rename_images(vault_path, folder_name):
                 except Exception as e:
                     print(f"Failed to update references in {md_file}: {e}")
 
+# Bytes hashed from each end of a file before falling back to a full hash
+PARTIAL_HASH_BLOCK = 64 * 1024
+
+def _hash_file(file_path, size, partial):
+    """Hash a file through mmap, either just its first/last blocks or in full."""
+    digest = hashlib.blake2b()
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if partial:
+            digest.update(mm[:PARTIAL_HASH_BLOCK])
+            digest.update(mm[max(size - PARTIAL_HASH_BLOCK, PARTIAL_HASH_BLOCK):])
+        else:
+            digest.update(mm)
+    return digest.hexdigest()
+
+def _group_by_hash(target_folder, file_names, size, partial):
+    """Split same-sized files into groups sharing a hash, dropping singletons."""
+    groups = defaultdict(list)
+    for file_name in file_names:
+        try:
+            groups[_hash_file(os.path.join(target_folder, file_name), size, partial)].append(file_name)
+        except (OSError, ValueError) as e:
+            print(f"Failed to hash {file_name}: {e}")
+    return [names for names in groups.values() if len(names) > 1]
+
+def _canonical_sort_key(file_name):
+    """Prefer already-renamed files, then the earliest name."""
+    return (file_name.startswith("Pasted image "), file_name)
+
+def find_duplicate_images(vault_path, folder_name):
+    """Find byte-identical images in the folder, canonical file first in each group."""
+    target_folder = os.path.join(vault_path, folder_name)
+    if not os.path.isdir(target_folder):
+        print(f"Error: The folder '{target_folder}' does not exist.")
+        return []
+
+    # Bucket by size first; a file with a unique size cannot have a duplicate
+    sizes = defaultdict(list)
+    with os.scandir(target_folder) as entries:
+        for entry in entries:
+            # Skip symlinks, which would hash identical to their targets
+            if entry.is_file(follow_symlinks=False):
+                sizes[entry.stat().st_size].append(entry.name)
+
+    duplicates = []
+    for size, file_names in sizes.items():
+        if len(file_names) < 2:
+            continue
+        if size == 0:
+            # Empty files are identical and cannot be mmapped
+            duplicates.append(file_names)
+            continue
+        for group in _group_by_hash(target_folder, file_names, size, partial=True):
+            if size <= 2 * PARTIAL_HASH_BLOCK:
+                # The partial hash already covered every byte
+                duplicates.append(group)
+            else:
+                duplicates.extend(_group_by_hash(target_folder, group, size, partial=False))
+
+    duplicates = sorted(sorted(group, key=_canonical_sort_key) for group in duplicates)
+    print(f"Found {sum(len(group) - 1 for group in duplicates)} duplicate images in {len(duplicates)} groups.")
+    return duplicates
+
+def _name_alternation(names):
+    """Regex alternation of file names, longest first so overlapping names match fully."""
+    return "|".join(re.escape(name) for name in sorted(names, key=len, reverse=True))
+
+def repoint_references(vault_path, duplicates):
+    """Point every note reference to a duplicate at its canonical file in one pass.
+
+    Returns the markdown files that could not be rewritten.
+    """
+    wiki_names = {}
+    markdown_names = {}
+    for canonical, *others in duplicates:
+        for other in others:
+            wiki_names[other] = canonical
+            # Markdown links encode spaces in the file name
+            markdown_names[other.replace(" ", "%20")] = canonical.replace(" ", "%20")
+    if not wiki_names:
+        return []
+
+    # Only match a name that starts a link target or follows a folder separator,
+    # and ends where the link, alias, heading or title begins
+    wiki_pattern = re.compile(
+        r"(\[\[(?:[^\]|#\n]*/)?)(" + _name_alternation(wiki_names) + r")(?=[\]|#])"
+    )
+    markdown_pattern = re.compile(
+        r"(\]\((?:<[^>\n]*/|<|[^)\s]*/)?)(" + _name_alternation({**wiki_names, **markdown_names}) + r")(?=[)#>\s])"
+    )
+
+    def replace_wiki(match):
+        prefix, name = match.groups()
+        return prefix + wiki_names[name]
+
+    def replace_markdown(match):
+        prefix, name = match.groups()
+        # Angle-bracketed targets keep spaces as-is
+        names = wiki_names if prefix.startswith("](<") else markdown_names
+        return prefix + names[name] if name in names else match.group(0)
+
+    failed = []
+    for root, _, files in os.walk(vault_path):
+        for file in files:
+            if not file.endswith(".md"):
+                continue
+            md_file = os.path.join(root, file)
+            try:
+                with open(md_file, "r", encoding="utf-8") as f:
+                    content = f.read()
+                updated_content = wiki_pattern.sub(replace_wiki, content)
+                updated_content = markdown_pattern.sub(replace_markdown, updated_content)
+                if updated_content != content:
+                    with open(md_file, "w", encoding="utf-8") as f:
+                        f.write(updated_content)
+                    print(f"Updated references in: {md_file}")
+            except Exception as e:
+                print(f"Failed to update references in {md_file}: {e}")
+                failed.append(md_file)
+    return failed
+
+def find_referenced_images(vault_path, image_names):
+    """Return the images still mentioned in any markdown file, raw or URL-decoded."""
+    referenced = set()
+    for root, _, files in os.walk(vault_path):
+        for file in files:
+            if not file.endswith(".md"):
+                continue
+            md_file = os.path.join(root, file)
+            try:
+                with open(md_file, "r", encoding="utf-8") as f:
+                    content = f.read()
+            except Exception as e:
+                print(f"Failed to read {md_file}: {e}")
+                return set(image_names)
+            decoded = unquote(content)
+            for image in image_names:
+                if image in content or image in decoded:
+                    referenced.add(image)
+    return referenced
+
 def main(vault_path, folder_name, action):
     if action == "missing":
         missing_images = find_missing_images(vault_path, folder_name)
@@ -110,14 +254,39 @@ def main(vault_path, folder_name, action):
                 print("No files were deleted.")
     elif action == "rename":
         rename_images(vault_path, folder_name)
+    elif action == "dedupe":
+        duplicates = find_duplicate_images(vault_path, folder_name)
+        print("Duplicate images:")
+        for canonical, *others in duplicates:
+            print(f"  {canonical}")
+            for img in others:
+                print(f"    - {img}")
+
+        # Prompt user before rewriting notes and deleting duplicates
+        if duplicates:
+            dedupe_input = input("Would you like to repoint references to the canonical files and delete the duplicates? (y/n): ").strip().lower()
+            if dedupe_input == "y":
+                failed = repoint_references(vault_path, duplicates)
+                if failed:
+                    print(f"Failed to update {len(failed)} notes, so no duplicates were deleted.")
+                    return
+                # Keep any duplicate a note still points at in a form the rewrite missed
+                others = [img for _, *others in duplicates for img in others]
+                referenced = find_referenced_images(vault_path, others)
+                for img in others:
+                    if img in referenced:
+                        print(f"Kept {img}: still referenced in notes.")
+                delete_files(os.path.join(vault_path, folder_name), [img for img in others if img not in referenced])
+            else:
+                print("No files were changed.")
     else:
-        print("Invalid action. Use 'missing' or 'rename'.")
+        print("Invalid action. Use 'missing', 'rename' or 'dedupe'.")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Utility for managing screenshots in an Obsidian vault.")
     parser.add_argument("vault_path", help="The path to your Obsidian vault.")
     parser.add_argument("--folder", default="Files", help="The folder containing the images (default: 'Files').")
-    parser.add_argument("--action", required=True, choices=["missing", "rename"], help="Action to perform: 'missing' or 'rename'.")
+    parser.add_argument("--action", required=True, choices=["missing", "rename", "dedupe"], help="Action to perform: 'missing', 'rename' or 'dedupe'.")
 
     args = parser.parse_args()
     main(args.vault_path, args.folder, args.action)
@@ -0,0 +1,120 @@
+import builtins
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import rename_obsidian_images as images
+
+BLOCK = images.PARTIAL_HASH_BLOCK
+
+@pytest.fixture
+def vault(tmp_path):
+    (tmp_path / "Files").mkdir()
+    (tmp_path / "notes").mkdir()
+    return tmp_path
+
+def write_image(vault, name, data):
+    (vault / "Files" / name).write_bytes(data)
+
+def test_large_files_differing_in_the_middle_are_not_duplicates(vault):
+    data = bytes(range(256)) * (3 * BLOCK // 256)
+    changed = bytearray(data)
+    changed[len(data) // 2] ^= 1
+    write_image(vault, "a.png", data)
+    write_image(vault, "b.png", data)
+    write_image(vault, "c.png", bytes(changed))
+    write_image(vault, "d.png", data + b"x")
+    assert images.find_duplicate_images(str(vault), "Files") == [["a.png", "b.png"]]
+
+@pytest.mark.parametrize("size", [10, BLOCK + 1, 2 * BLOCK])
+def test_small_files_resolved_by_partial_hash(vault, size):
+    write_image(vault, "a.png", b"x" * size)
+    write_image(vault, "b.png", b"x" * size)
+    write_image(vault, "c.png", b"x" * (size - 1) + b"y")
+    assert images.find_duplicate_images(str(vault), "Files") == [["a.png", "b.png"]]
+
+def test_empty_files_are_duplicates(vault):
+    write_image(vault, "a.png", b"")
+    write_image(vault, "b.png", b"")
+    assert images.find_duplicate_images(str(vault), "Files") == [["a.png", "b.png"]]
+
+def test_symlinks_are_skipped(vault):
+    write_image(vault, "a.png", b"data")
+    os.symlink("a.png", vault / "Files" / "link.png")
+    assert images.find_duplicate_images(str(vault), "Files") == []
+
+def test_file_truncated_before_hashing_is_skipped(vault):
+    write_image(vault, "a.png", b"")
+    write_image(vault, "b.png", b"data")
+    write_image(vault, "c.png", b"data")
+    # a.png was listed at 4 bytes but is empty by the time it is mmapped
+    groups = images._group_by_hash(str(vault / "Files"), ["a.png", "b.png", "c.png"], 4, partial=True)
+    assert groups == [["b.png", "c.png"]]
+
+def test_canonical_prefers_renamed_then_earliest(vault):
+    for name in ["Pasted image 20240101000000.png", "Pasted image 20230101000000.png", "image-20250101000000.png"]:
+        write_image(vault, name, b"same")
+    for name in ["Pasted image 20240101000000.jpg", "Pasted image 20230101000000.jpg"]:
+        write_image(vault, name, b"other")
+    assert images.find_duplicate_images(str(vault), "Files") == [
+        ["Pasted image 20230101000000.jpg", "Pasted image 20240101000000.jpg"],
+        ["image-20250101000000.png", "Pasted image 20230101000000.png", "Pasted image 20240101000000.png"],
+    ]
+
+def test_repoint_references_link_forms(vault):
+    note = vault / "notes" / "n.md"
+    note.write_text(
+        "![[Files/Pasted image 20230101000000.png]]\n"
+        "![[Pasted image 20230101000000.png|300]]\n"
+        "![[Pasted image 20230101000000.png#top]]\n"
+        "![x](Files/Pasted%20image%2020230101000000.png \"t\")\n"
+        "![y](<Files/Pasted image 20230101000000.png>)\n"
+        "![[data.png]] ![](Files/data.png)\n",
+        encoding="utf-8",
+    )
+    duplicates = [["Screenshot 1.png", "Pasted image 20230101000000.png"], ["0.png", "a.png"]]
+    assert images.repoint_references(str(vault), duplicates) == []
+    assert note.read_text(encoding="utf-8") == (
+        "![[Files/Screenshot 1.png]]\n"
+        "![[Screenshot 1.png|300]]\n"
+        "![[Screenshot 1.png#top]]\n"
+        "![x](Files/Screenshot%201.png \"t\")\n"
+        "![y](<Files/Screenshot 1.png>)\n"
+        "![[data.png]] ![](Files/data.png)\n"
+    )
+
+def test_duplicates_kept_when_note_fails_to_rewrite(vault, monkeypatch):
+    write_image(vault, "a.png", b"same")
+    write_image(vault, "b.png", b"same")
+    (vault / "notes" / "n.md").write_text("![[b.png]]", encoding="utf-8")
+
+    def failing_open(path, mode="r", *args, **kwargs):
+        if "w" in mode:
+            raise OSError("read-only")
+        return builtins.open(path, mode, *args, **kwargs)
+
+    monkeypatch.setattr(images, "open", failing_open, raising=False)
+    monkeypatch.setattr(builtins, "input", lambda *_: "y")
+    images.main(str(vault), "Files", "dedupe")
+    assert sorted(os.listdir(vault / "Files")) == ["a.png", "b.png"]
+
+def test_duplicates_still_referenced_are_kept(vault, monkeypatch):
+    write_image(vault, "a.png", b"same")
+    write_image(vault, "Pasted image 20230101000000.png", b"same")
+    write_image(vault, "Pasted image 20230102000000.png", b"same")
+    write_image(vault, "Pasted image 20230103000000.png", b"same")
+    note = vault / "notes" / "n.md"
+    note.write_text(
+        '<img src="Files/Pasted image 20230101000000.png">\n'
+        "![](Files/Pasted%20image%2020230102000000.png?raw)\n"
+        "![[Pasted image 20230103000000.png]]\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(builtins, "input", lambda *_: "y")
+    images.main(str(vault), "Files", "dedupe")
+    assert sorted(os.listdir(vault / "Files")) == [
+        "Pasted image 20230101000000.png", "Pasted image 20230102000000.png", "a.png",
+    ]
+    assert "![[a.png]]" in note.read_text(encoding="utf-8")
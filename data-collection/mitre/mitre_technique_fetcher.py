@@ -1,4 +1,7 @@
 import argparse
+import json
+import os
+import time
 import requests
 import yaml
 import re
@@ -37,21 +40,90 @@ def fetch_attack_data(version: str):
         raise Exception(f"Failed to fetch data: {response.status_code}")
     return response.json()
 
-# Fetch available versions from GitHub
-def fetch_attack_versions():
-    url = "https://api.github.com/repos/mitre/cti/tags"
-    response = requests.get(url, timeout=60)
-    if response.status_code != 200:
-        raise Exception(f"Failed to fetch version data: {response.status_code}")
-
-    tags = response.json()
-    return [tag['name'] for tag in tags if 'ATT&CK-' in tag['name']]
-
-# Find the highest matching tag for a version
-def find_highest_matching_tag(version, tags):
-    version_pattern = re.compile(f"ATT&CK-v{version.replace('v', '')}\.?\d*")
-    matching_tags = [tag for tag in tags if version_pattern.match(tag)]
-    return sorted(matching_tags, key=lambda x: x.split('-v')[-1], reverse=True)[0] if matching_tags else None
+# GitHub tags API for the ATT&CK CTI repo and the local release catalog cache
+TAGS_API_URL = "https://api.github.com/repos/mitre/cti/tags"
+TAGS_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "the-script-bin", "attack_tags.json")
+TAGS_CACHE_TTL = 7 * 24 * 60 * 60  # one week, releases are infrequent
+TAG_PATTERN = re.compile(r"^ATT&CK-v(\d+(?:\.\d+)*)$")
+
+# Fetch available versions from GitHub, following every page of results
+def fetch_attack_versions(api_url=TAGS_API_URL):
+    tags = []
+    url = api_url
+    params = {"per_page": 100}
+    while url:
+        response = requests.get(url, params=params, timeout=60)
+        if response.status_code != 200:
+            raise Exception(f"Failed to fetch version data: {response.status_code}")
+        tags.extend(tag['name'] for tag in response.json() if 'ATT&CK-' in tag['name'])
+        # The "next" link already carries the query string
+        url = response.links.get("next", {}).get("url")
+        params = None
+    return tags
+
+# Read the cached release catalog, ignoring it if it came from a different API URL
+def read_tags_cache(cache_file, api_url):
+    try:
+        with open(cache_file, 'r') as file:
+            cache = json.load(file)
+        if cache["api_url"] == api_url and isinstance(cache["fetched_at"], (int, float)) and isinstance(cache["tags"], list):
+            return cache
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+# Load the release catalog from the local cache, refreshing it from GitHub when stale
+def load_attack_versions(cache_file=TAGS_CACHE_FILE, ttl=TAGS_CACHE_TTL, refresh=False, api_url=TAGS_API_URL):
+    cache = read_tags_cache(cache_file, api_url)
+    if cache and not refresh and time.time() - cache["fetched_at"] < ttl:
+        return cache["tags"]
+
+    try:
+        tags = fetch_attack_versions(api_url)
+    except Exception as e:
+        if not cache:
+            raise
+        print(f"Failed to refresh version data, using cached catalog: {e}")
+        return cache["tags"]
+
+    tmp_file = f"{cache_file}.tmp"
+    try:
+        cache_dir = os.path.dirname(cache_file)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp_file, 'w') as file:
+            json.dump({"api_url": api_url, "fetched_at": time.time(), "tags": tags}, file, indent=4)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(f"Failed to write version cache {cache_file}: {e}")
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+    return tags
+
+# Parse a tag like "ATT&CK-v15.1" into a numeric version tuple, e.g. (15, 1)
+def parse_attack_tag(tag):
+    match = TAG_PATTERN.match(tag)
+    if not match:
+        return None
+    return tuple(int(part) for part in match.group(1).split('.'))
+
+# Index tags by major version, keeping only the highest release of each
+def build_tag_index(tags):
+    index = {}
+    for tag in tags:
+        parsed = parse_attack_tag(tag)
+        if parsed is None:
+            continue
+        major = parsed[0]
+        if major not in index or parsed > index[major][0]:
+            index[major] = (parsed, tag)
+    return {major: tag for major, (_, tag) in index.items()}
+
+# Find the highest matching tag for a version in an index from build_tag_index
+def find_highest_matching_tag(version, index):
+    return index.get(int(version.lstrip('v')))
 
 def extract_techniques(data, filtered_ids, version):
     techniques = {"mitre": []}
@@ -103,6 +175,10 @@ def main():
     parser = argparse.ArgumentParser(description="Fetch MITRE ATT&CK Techniques and filter by provided URL.")
     parser.add_argument("--url", required=True, help="URL of the MITRE ATT&CK Techniques page")
     parser.add_argument("--filename", default="output", help="Base output filename without extension")
+    parser.add_argument("--tags-cache", default=TAGS_CACHE_FILE, help="Path to the cached ATT&CK release catalog")
+    parser.add_argument("--tags-cache-ttl", type=int, default=TAGS_CACHE_TTL, help="Seconds before the release catalog is refetched")
+    parser.add_argument("--refresh-tags", action="store_true", help="Ignore the cached release catalog and refetch it")
+    parser.add_argument("--tags-api-url", default=TAGS_API_URL, help="GitHub tags API endpoint (override to point at a local stand-in)")
     args = parser.parse_args()
 
     url_version_match = re.search(r"/versions/(v\d+)/techniques/enterprise/", args.url)
@@ -110,8 +186,8 @@ def main():
         raise ValueError("Invalid URL format. Please provide a valid MITRE ATT&CK URL.")
 
     url_version = url_version_match.group(1)
-    tags = fetch_attack_versions()
-    highest_tag = find_highest_matching_tag(url_version, tags)
+    tags = load_attack_versions(args.tags_cache, args.tags_cache_ttl, args.refresh_tags, args.tags_api_url)
+    highest_tag = find_highest_matching_tag(url_version, build_tag_index(tags))
     if not highest_tag:
         raise ValueError("No matching version tag found in the GitHub repository.")
 
@@ -0,0 +1,107 @@
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import mitre_technique_fetcher as fetcher
+
+PAGES = [
+    [{"name": "ATT&CK-v15.1"}, {"name": "ATT&CK-v15.10"}, {"name": "ATT&CK-v15.9"}, {"name": "v1.0-rc"}],
+    [{"name": "ATT&CK-v10.1"}, {"name": "ATT&CK-v10.0"}, {"name": "ATT&CK-v9.0"}, {"name": "ATT&CK-v1.0"}],
+]
+
+# Local stand-in for the GitHub tags API, serving PAGES with Link headers
+@pytest.fixture
+def tags_api():
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            page = int(parse_qs(urlparse(self.path).query).get("page", ["1"])[0])
+            body = json.dumps(PAGES[page - 1]).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            if page < len(PAGES):
+                self.send_header("Link", f'<http://127.0.0.1:{server.server_port}/tags?page={page + 1}>; rel="next"')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/tags", hits
+    server.shutdown()
+    server.server_close()
+
+def test_fetch_reads_all_pages(tags_api):
+    url, hits = tags_api
+    tags = fetcher.fetch_attack_versions(url)
+    assert len(hits) == 2
+    assert "ATT&CK-v15.1" in tags and "ATT&CK-v1.0" in tags
+    assert "v1.0-rc" not in tags
+
+def test_second_load_is_served_from_cache(tags_api, tmp_path):
+    url, hits = tags_api
+    cache_file = str(tmp_path / "tags.json")
+    first = fetcher.load_attack_versions(cache_file, api_url=url)
+    assert len(hits) == 2
+    second = fetcher.load_attack_versions(cache_file, api_url=url)
+    assert second == first
+    assert len(hits) == 2
+
+def test_cache_from_other_url_is_ignored(tags_api, tmp_path):
+    url, hits = tags_api
+    cache_file = tmp_path / "tags.json"
+    cache_file.write_text(json.dumps({"api_url": "http://elsewhere/tags", "fetched_at": 9e18, "tags": ["ATT&CK-v2.0"]}))
+    tags = fetcher.load_attack_versions(str(cache_file), api_url=url)
+    assert "ATT&CK-v2.0" not in tags
+    assert len(hits) == 2
+
+@pytest.mark.parametrize("cache", [
+    {"api_url": "URL", "tags": ["ATT&CK-v2.0"]},
+    {"api_url": "URL", "fetched_at": 9e18},
+    {"api_url": "URL", "fetched_at": "soon", "tags": ["ATT&CK-v2.0"]},
+])
+def test_incomplete_cache_is_refetched(tags_api, tmp_path, cache):
+    url, hits = tags_api
+    cache_file = tmp_path / "tags.json"
+    cache_file.write_text(json.dumps({**cache, "api_url": url}))
+    tags = fetcher.load_attack_versions(str(cache_file), api_url=url)
+    assert "ATT&CK-v15.1" in tags
+    assert len(hits) == 2
+
+def test_unwritable_cache_still_returns_tags(tags_api, tmp_path):
+    url, hits = tags_api
+    blocker = tmp_path / "blocker"
+    blocker.write_text("")
+    # The cache directory cannot be created under a regular file
+    cache_file = blocker / "tags.json"
+    tags = fetcher.load_attack_versions(str(cache_file), api_url=url)
+    assert "ATT&CK-v15.1" in tags
+    assert not os.path.exists(f"{cache_file}.tmp")
+
+def test_stale_cache_used_when_refresh_fails(tmp_path):
+    url = "http://127.0.0.1:1/tags"
+    cache_file = tmp_path / "tags.json"
+    cache_file.write_text(json.dumps({"api_url": url, "fetched_at": 0, "tags": ["ATT&CK-v9.0"]}))
+    assert fetcher.load_attack_versions(str(cache_file), api_url=url) == ["ATT&CK-v9.0"]
+
+@pytest.mark.parametrize("version, expected", [
+    ("v15", "ATT&CK-v15.10"),
+    ("v9", "ATT&CK-v9.0"),
+    ("v1", "ATT&CK-v1.0"),
+    ("v3", None),
+])
+def test_find_highest_matching_tag(version, expected):
+    tags = [tag["name"] for page in PAGES for tag in page]
+    index = fetcher.build_tag_index(tags)
+    assert fetcher.find_highest_matching_tag(version, index) == expected